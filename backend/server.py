@@ -1,16 +1,25 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Query, Body
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from motor.motor_asyncio import AsyncIOMotorClient
-from pydantic import BaseModel, Field
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from pydantic import BaseModel, Field, TypeAdapter
 from typing import List, Dict, Optional, Any
 from datetime import datetime
 import os
+import asyncio
+import hashlib
 import logging
-import uuid
+import math
+import time
+import re
 from pathlib import Path
 from enum import Enum
+from functools import lru_cache
 import random
 from dotenv import load_dotenv
+from ulid import ULID
 import numpy as np
 from sklearn.cluster import DBSCAN
 from scipy.spatial import distance
@@ -22,13 +31,18 @@ load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(mongo_url)
+# Compress wire traffic; zlib is the fallback when zstandard is not installed
+client = AsyncIOMotorClient(
+    mongo_url,
+    compressors=os.environ.get('MONGO_COMPRESSORS', 'zstd,zlib')
+)
 db = client[os.environ.get('DB_NAME', 'mandoob_db')]
 
 # Create the main app without a prefix
 app = FastAPI(title="Mandoob Pro API", 
              description="API for delivery driver assistance app",
-             version="1.0.0")
+             version="1.0.0",
+             default_response_class=ORJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -57,7 +71,7 @@ class Location(BaseModel):
     address: Optional[str] = None
 
 class Order(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: str(ULID()))
     source_app: DeliveryApp
     pickup_location: Location
     delivery_location: Location
@@ -71,6 +85,11 @@ class Order(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+    @classmethod
+    def from_create(cls, order: "OrderCreate") -> "Order":
+        """Build a new order from already validated create data, filling in defaults"""
+        return cls.model_construct(**{k: v for k, v in order if v is not None})
+
 class OrderCreate(BaseModel):
     source_app: DeliveryApp
     pickup_location: Location
@@ -82,6 +101,18 @@ class OrderCreate(BaseModel):
     amount: Optional[float] = None
     items: Optional[str] = None
 
+class OrderUpdate(BaseModel):
+    source_app: Optional[DeliveryApp] = None
+    pickup_location: Optional[Location] = None
+    delivery_location: Optional[Location] = None
+    pickup_time: Optional[datetime] = None
+    delivery_deadline: Optional[datetime] = None
+    status: Optional[OrderStatus] = None
+    customer_name: Optional[str] = None
+    restaurant_name: Optional[str] = None
+    amount: Optional[float] = None
+    items: Optional[str] = None
+
 class RoutePoint(BaseModel):
     order_id: str
     location: Location
@@ -89,7 +120,7 @@ class RoutePoint(BaseModel):
     eta: Optional[datetime] = None
 
 class Route(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: str(ULID()))
     driver_id: Optional[str] = None
     points: List[RoutePoint]
     total_distance: float
@@ -112,15 +143,114 @@ class NotificationParseRequest(BaseModel):
     notification_text: str
     app_name: Optional[DeliveryApp] = None
 
+# Validates a whole list of orders in a single pydantic-core call
+_ORDER_LIST_ADAPTER = TypeAdapter(List[Order])
+
+# Mock data: known locations in Cairo, shared by the mock endpoints and the
+# notification parser
+LOCATIONS = np.array([
+    [30.0444, 31.2357],
+    [30.0566, 31.2394],
+    [30.0455, 31.2240],
+    [30.0626, 31.2497],
+    [30.0700, 31.2200],
+    [30.0571, 31.2272],
+    [30.0484, 31.2354],
+    [30.0751, 31.2394],
+])
+ADDRESSES = (
+    "Downtown Cairo",
+    "Tahrir Square",
+    "Cairo University",
+    "Ramses Square",
+    "Dokki",
+    "Mohandiseen",
+    "Garden City",
+    "Heliopolis",
+)
+_RNG = np.random.default_rng()
+
+def mock_location_indices(count: int) -> tuple:
+    """Draw pickup and delivery indices into LOCATIONS, never the same for one order"""
+    pickup_idx = _RNG.integers(0, len(LOCATIONS), size=count)
+    # A non-zero offset guarantees a different delivery location without retries
+    delivery_idx = (pickup_idx + _RNG.integers(1, len(LOCATIONS), size=count)) % len(LOCATIONS)
+    return pickup_idx.tolist(), delivery_idx.tolist()
+
+def mock_location(idx: int) -> Location:
+    """Build a Location from the mock locations table"""
+    lat, lng = LOCATIONS[idx].tolist()
+    return Location(lat=lat, lng=lng, address=ADDRESSES[idx])
+
+# Database helpers
+def order_from_db(doc: dict) -> Order:
+    """Build an Order from a stored document without re-running validation"""
+    # Documents are validated on insert and update; only restore the nested
+    # models and enums so serialization sees the expected types
+    return Order.model_construct(**{
+        **doc,
+        "source_app": DeliveryApp(doc["source_app"]),
+        "status": OrderStatus(doc["status"]),
+        "pickup_location": Location.model_construct(**doc["pickup_location"]),
+        "delivery_location": Location.model_construct(**doc["delivery_location"]),
+    })
+
 # Utility functions for route optimization
-def calculate_distance(point1: Location, point2: Location) -> float:
-    """Calculate Euclidean distance between two points (simplified)"""
-    return distance.euclidean(
-        [point1.lat, point1.lng],
-        [point2.lat, point2.lng]
-    ) * 111  # Rough conversion to kilometers
-
-def optimize_route(orders: List[Order], start_location: Optional[Location] = None) -> Route:
+# Planar (FCC / cheap-ruler) approximation: kilometers per degree of latitude,
+# and per degree of longitude at the equator (scaled by cos(lat))
+KM_PER_DEG_LAT = 110.574
+KM_PER_DEG_LNG = 111.320
+
+def km_scale(ref_lat: float) -> np.ndarray:
+    """Kilometers per degree of (lat, lng) around a reference latitude"""
+    return np.array([KM_PER_DEG_LAT, KM_PER_DEG_LNG * math.cos(math.radians(ref_lat))])
+
+def order_coordinates(orders: List[Order]) -> tuple:
+    """Pickup and delivery coordinates as contiguous arrays: (p_lat, p_lng, d_lat, d_lng)"""
+    n = len(orders)
+    return (
+        np.fromiter((o.pickup_location.lat for o in orders), np.float64, count=n),
+        np.fromiter((o.pickup_location.lng for o in orders), np.float64, count=n),
+        np.fromiter((o.delivery_location.lat for o in orders), np.float64, count=n),
+        np.fromiter((o.delivery_location.lng for o in orders), np.float64, count=n),
+    )
+
+def improve_route(idx_seq: np.ndarray, D: np.ndarray) -> np.ndarray:
+    """Improve a route with 2-opt segment reversals.
+    
+    idx_seq starts at the start location (last row of D) and visits every
+    point once, with point 2k the pickup and 2k + 1 the delivery of order k.
+    The start stays fixed, the route end is open, and reversals that would
+    put a delivery before its pickup are rejected.
+    """
+    seq = idx_seq.copy()
+    n = len(seq)
+    position = np.empty(n, dtype=int)
+    
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 1):
+            for j in range(i + 1, n):
+                # Reversing seq[i:j + 1] replaces the edges entering seq[i] and
+                # leaving seq[j]; the last point has no leaving edge
+                gain = D[seq[i - 1], seq[i]] - D[seq[i - 1], seq[j]]
+                if j + 1 < n:
+                    gain += D[seq[j], seq[j + 1]] - D[seq[i], seq[j + 1]]
+                if gain <= 1e-9:
+                    continue
+                
+                candidate = seq.copy()
+                candidate[i:j + 1] = candidate[i:j + 1][::-1]
+                position[candidate] = np.arange(n)
+                if np.all(position[0:n - 1:2] < position[1:n - 1:2]):
+                    seq = candidate
+                    improved = True
+    
+    return seq
+
+def optimize_route(orders: List[Order], start_location: Optional[Location] = None,
+                   coordinates: Optional[tuple] = None) -> Route:
     """Simple route optimization algorithm"""
     if not orders:
         raise ValueError("No orders to optimize")
@@ -129,62 +259,47 @@ def optimize_route(orders: List[Order], start_location: Optional[Location] = Non
         # Use the first order's pickup location as starting point
         start_location = orders[0].pickup_location
     
-    # Create a list of all points (pickup and delivery)
-    all_points = []
-    for order in orders:
-        all_points.append({"order_id": order.id, "location": order.pickup_location, "is_pickup": True})
-        all_points.append({"order_id": order.id, "location": order.delivery_location, "is_pickup": False})
-    
-    # Ensure pickups happen before their corresponding deliveries
-    optimized_points = []
-    current_location = start_location
-    unvisited = all_points.copy()
-    pickup_completed = set()
-    
-    # First, handle all pickups using a greedy approach
-    while any(point["is_pickup"] for point in unvisited):
-        pickup_points = [point for point in unvisited if point["is_pickup"]]
-        if not pickup_points:
-            break
-            
-        # Find nearest pickup point
-        nearest = min(
-            pickup_points,
-            key=lambda p: calculate_distance(current_location, p["location"])
-        )
-        
-        # Add to route
-        optimized_points.append(nearest)
-        pickup_completed.add(nearest["order_id"])
-        unvisited.remove(nearest)
-        current_location = nearest["location"]
-    
-    # Then, handle all deliveries
-    while unvisited:
-        delivery_points = [point for point in unvisited 
-                          if (not point["is_pickup"] and point["order_id"] in pickup_completed)]
-        if not delivery_points:
-            break
-            
-        # Find nearest delivery point
-        nearest = min(
-            delivery_points,
-            key=lambda p: calculate_distance(current_location, p["location"])
-        )
+    # Flatten all points (pickup and delivery): point 2k is the pickup of
+    # orders[k] and point 2k + 1 its delivery
+    locations = [loc for order in orders for loc in (order.pickup_location, order.delivery_location)]
+    n_points = len(locations)
+    
+    # Stack all points (with the start location as the last row), project them
+    # to kilometers around the start latitude and compute every pairwise squared
+    # distance in one batched call; the greedy search only compares, so no sqrt
+    p_lat, p_lng, d_lat, d_lng = coordinates or order_coordinates(orders)
+    coords = np.empty((n_points + 1, 2))
+    coords[0:n_points:2, 0], coords[0:n_points:2, 1] = p_lat, p_lng
+    coords[1:n_points:2, 0], coords[1:n_points:2, 1] = d_lat, d_lng
+    coords[n_points] = start_location.lat, start_location.lng
+    coords *= km_scale(start_location.lat)
+    D2 = distance.cdist(coords, coords, "sqeuclidean")
+    
+    order_idx = np.arange(n_points) // 2
+    is_pickup = np.arange(n_points) % 2 == 0
+    visited = np.zeros(n_points, dtype=bool)
+    picked_up = np.zeros(len(orders), dtype=bool)
+    
+    # Ensure pickups happen before their corresponding deliveries:
+    # first visit all pickups greedily, then the deliveries of picked-up orders
+    idx_seq = [n_points]
+    current_idx = n_points
+    for _ in range(n_points):
+        candidates = is_pickup & ~visited
+        if not candidates.any():
+            candidates = ~is_pickup & ~visited & picked_up[order_idx]
         
-        # Add to route
-        optimized_points.append(nearest)
-        unvisited.remove(nearest)
-        current_location = nearest["location"]
-    
-    # Calculate total distance and time
-    total_distance = 0
-    prev_location = start_location
-    
-    for point in optimized_points:
-        dist = calculate_distance(prev_location, point["location"])
-        total_distance += dist
-        prev_location = point["location"]
+        # Find nearest eligible point
+        current_idx = int(np.argmin(np.where(candidates, D2[current_idx, :n_points], np.inf)))
+        visited[current_idx] = True
+        if is_pickup[current_idx]:
+            picked_up[order_idx[current_idx]] = True
+        idx_seq.append(current_idx)
+    
+    # Refine the greedy route, then calculate total distance and time
+    D = np.sqrt(D2)
+    idx_seq = improve_route(np.array(idx_seq), D)
+    total_distance = float(D[idx_seq[:-1], idx_seq[1:]].sum())
     
     # Estimate time based on average speed of 30 km/h
     total_time = int(total_distance / 30 * 60)  # Convert to minutes
@@ -192,10 +307,10 @@ def optimize_route(orders: List[Order], start_location: Optional[Location] = Non
     # Create RoutePoints for the response
     route_points = [
         RoutePoint(
-            order_id=p["order_id"],
-            location=p["location"],
-            is_pickup=p["is_pickup"]
-        ) for p in optimized_points
+            order_id=orders[i // 2].id,
+            location=locations[i],
+            is_pickup=bool(is_pickup[i])
+        ) for i in idx_seq[1:]
     ]
     
     return Route(
@@ -204,8 +319,13 @@ def optimize_route(orders: List[Order], start_location: Optional[Location] = Non
         total_time=total_time
     )
 
-def calculate_profits(orders: List[Order], optimized_route: Route) -> dict:
-    """Calculate individual vs merged profits"""
+def calculate_profits(orders: List[Order], optimized_route: Route,
+                      coordinates: Optional[tuple] = None, ref_lat: Optional[float] = None) -> dict:
+    """Calculate individual vs merged profits.
+    
+    ref_lat must be the latitude the route was projected around (the route's
+    start, by default the first pickup) so both distances use one projection.
+    """
     # For demonstration, use a simple model
     # Individual: base fee + distance fee
     # Merged: same total base fee, but reduced total distance fee
@@ -214,12 +334,12 @@ def calculate_profits(orders: List[Order], optimized_route: Route) -> dict:
     distance_fee_per_km = 2  # Fee per kilometer in Egyptian Pounds
     
     # Calculate individual profit
-    individual_distance = 0
-    for order in orders:
-        # Simple there and back for each order individually
-        individual_distance += (
-            calculate_distance(order.pickup_location, order.delivery_location) * 2
-        )
+    # Simple there and back for each order individually
+    p_lat, p_lng, d_lat, d_lng = coordinates or order_coordinates(orders)
+    if ref_lat is None:
+        ref_lat = orders[0].pickup_location.lat
+    ky, kx = km_scale(ref_lat)
+    individual_distance = float(np.hypot(ky * (p_lat - d_lat), kx * (p_lng - d_lng)).sum()) * 2
     
     individual_profit = len(orders) * base_fee_per_order + individual_distance * distance_fee_per_km
     
@@ -237,6 +357,29 @@ def calculate_profits(orders: List[Order], optimized_route: Route) -> dict:
         "distance_saved": distance_saved
     }
 
+# Notification keywords, compiled once so each lookup is a single pass over the text.
+# APP_KEYWORDS is in precedence order for texts that mention several apps
+APP_KEYWORDS = {
+    "طلبات": DeliveryApp.TALABAT,
+    "Talabat": DeliveryApp.TALABAT,
+    "Uber": DeliveryApp.UBER_EATS,
+    "Elmenus": DeliveryApp.ELMENUS,
+    "Otlob": DeliveryApp.OTLOB,
+}
+APP_PATTERN = re.compile("|".join(map(re.escape, APP_KEYWORDS)))
+# Name patterns capture the text after the first keyword up to the next comma,
+# English first with the Arabic form as fallback
+RESTAURANT_PATTERNS = (re.compile(r"restaurant([^,]*)"), re.compile(r"مطعم([^،]*)"))
+CUSTOMER_PATTERNS = (re.compile(r"customer([^,]*)"), re.compile(r"عميل([^،]*)"))
+
+def extract_name(patterns: tuple, text: str) -> Optional[str]:
+    """Return the text captured by the first pattern that matches"""
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match:
+            return match.group(1).strip()
+    return None
+
 def extract_order_from_notification(notification_text: str, app_name: Optional[DeliveryApp] = None) -> Optional[OrderCreate]:
     """Extract order details from notification text using simple pattern matching"""
     # This is a simplified mock implementation
@@ -244,54 +387,82 @@ def extract_order_from_notification(notification_text: str, app_name: Optional[D
     
     # If no app specified, try to detect it
     if app_name is None:
-        if "طلبات" in notification_text or "Talabat" in notification_text:
-            app_name = DeliveryApp.TALABAT
-        elif "Uber" in notification_text:
-            app_name = DeliveryApp.UBER_EATS
-        elif "Elmenus" in notification_text:
-            app_name = DeliveryApp.ELMENUS
-        elif "Otlob" in notification_text:
-            app_name = DeliveryApp.OTLOB
-        else:
-            app_name = DeliveryApp.OTHER
+        found = {match.group() for match in APP_PATTERN.finditer(notification_text)}
+        app_name = next(
+            (app for keyword, app in APP_KEYWORDS.items() if keyword in found),
+            DeliveryApp.OTHER
+        )
     
     # Generate mock data for testing
     # In a real implementation, this would parse the actual notification text
-    mock_locations = [
-        {"lat": 30.0444, "lng": 31.2357, "address": "Downtown Cairo"},
-        {"lat": 30.0566, "lng": 31.2394, "address": "Tahrir Square"},
-        {"lat": 30.0455, "lng": 31.2240, "address": "Cairo University"},
-        {"lat": 30.0626, "lng": 31.2497, "address": "Ramses Square"},
-        {"lat": 30.0700, "lng": 31.2200, "address": "Dokki"},
-    ]
-    
-    pickup = random.choice(mock_locations)
-    delivery = random.choice([loc for loc in mock_locations if loc != pickup])
+    (pickup_idx,), (delivery_idx,) = mock_location_indices(1)
     
     # Try to extract restaurant and customer names (simplified)
-    restaurant_name = None
-    customer_name = None
-    
-    if "restaurant" in notification_text:
-        restaurant_name = notification_text.split("restaurant")[1].split(",")[0].strip()
-    elif "مطعم" in notification_text:
-        restaurant_name = notification_text.split("مطعم")[1].split("،")[0].strip()
-    
-    if "customer" in notification_text:
-        customer_name = notification_text.split("customer")[1].split(",")[0].strip()
-    elif "عميل" in notification_text:
-        customer_name = notification_text.split("عميل")[1].split("،")[0].strip()
+    restaurant_name = extract_name(RESTAURANT_PATTERNS, notification_text)
+    customer_name = extract_name(CUSTOMER_PATTERNS, notification_text)
     
     # Create mock order with some randomization for testing
     return OrderCreate(
         source_app=app_name,
-        pickup_location=Location(lat=pickup["lat"], lng=pickup["lng"], address=pickup["address"]),
-        delivery_location=Location(lat=delivery["lat"], lng=delivery["lng"], address=delivery["address"]),
+        pickup_location=mock_location(pickup_idx),
+        delivery_location=mock_location(delivery_idx),
         restaurant_name=restaurant_name or f"Restaurant {random.randint(1, 100)}",
         customer_name=customer_name or f"Customer {random.randint(1, 100)}",
         amount=random.randint(50, 500)
     )
 
+def build_optimization_response(orders: List[Order], start_location: Optional[Location] = None) -> RouteOptimizationResponse:
+    """Optimize the route for the orders and compare it with delivering them one by one"""
+    coordinates = order_coordinates(orders)
+    
+    # Perform route optimization
+    optimized_route = optimize_route(orders, start_location, coordinates)
+    
+    # Calculate profits, measured in the same projection as the route
+    ref_lat = (start_location or orders[0].pickup_location).lat
+    profit_info = calculate_profits(orders, optimized_route, coordinates, ref_lat)
+    
+    return RouteOptimizationResponse(
+        route=optimized_route,
+        estimated_profit=profit_info["merged_profit"],
+        individual_profit=profit_info["individual_profit"],
+        merged_profit=profit_info["merged_profit"],
+        time_saved=profit_info["time_saved"],
+        distance_saved=profit_info["distance_saved"]
+    )
+
+def location_key(location: Optional[Location]) -> Optional[tuple]:
+    """Hashable representation of a location"""
+    if location is None:
+        return None
+    return (location.lat, location.lng, location.address)
+
+def location_from_key(key: Optional[tuple]) -> Optional[Location]:
+    """Inverse of location_key"""
+    if key is None:
+        return None
+    lat, lng, address = key
+    return Location(lat=lat, lng=lng, address=address)
+
+@lru_cache(maxsize=512)
+def cached_optimization_response(orders_key: tuple, start_key: Optional[tuple]) -> RouteOptimizationResponse:
+    """Memoized build_optimization_response keyed on everything the optimization reads:
+    each order's id and locations, plus the start location"""
+    orders = [
+        Order.model_construct(
+            id=order_id,
+            pickup_location=location_from_key(pickup_key),
+            delivery_location=location_from_key(delivery_key)
+        ) for order_id, pickup_key, delivery_key in orders_key
+    ]
+    return build_optimization_response(orders, location_from_key(start_key))
+
+def optimization_response(orders_key: tuple, start_key: Optional[tuple]) -> RouteOptimizationResponse:
+    """cached_optimization_response with a new route id and timestamp for every request"""
+    optimization = cached_optimization_response(orders_key, start_key)
+    route = optimization.route.model_copy(update={"id": str(ULID()), "created_at": datetime.utcnow()})
+    return optimization.model_copy(update={"route": route})
+
 # API Routes
 @api_router.get("/")
 async def root():
@@ -299,69 +470,74 @@ async def root():
 
 @api_router.post("/orders", response_model=Order)
 async def create_order(order: OrderCreate):
-    order_dict = order.model_dump()
-    order_obj = Order(**order_dict)
+    order_obj = Order.from_create(order)
     await db.orders.insert_one(order_obj.model_dump())
     return order_obj
 
-@api_router.get("/orders", response_model=List[Order])
+# Returned directly as ORJSONResponse without response_model re-validation;
+# `responses` keeps the schema in the OpenAPI docs
+@api_router.get("/orders", response_model=None, responses={200: {"model": List[Order]}})
 async def get_orders(status: Optional[OrderStatus] = None, limit: int = 50):
     """Get orders with optional status filter"""
     query = {}
     if status:
         query["status"] = status
     
-    orders = await db.orders.find(query).sort("created_at", -1).limit(limit).to_list(limit)
-    return [Order(**order) for order in orders]
+    orders = await db.orders.find(query, {"_id": 0}).sort("created_at", -1).limit(limit).to_list(limit)
+    return ORJSONResponse([order_from_db(order).model_dump(mode="json") for order in orders])
 
 @api_router.get("/orders/{order_id}", response_model=Order)
 async def get_order(order_id: str):
     """Get order by ID"""
-    order = await db.orders.find_one({"id": order_id})
+    order = await db.orders.find_one({"id": order_id}, {"_id": 0})
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
-    return Order(**order)
+    return order_from_db(order)
 
 @api_router.put("/orders/{order_id}", response_model=Order)
-async def update_order(order_id: str, order_update: dict = Body(...)):
+async def update_order(order_id: str, order_update: OrderUpdate):
     """Update order fields"""
-    order = await db.orders.find_one({"id": order_id})
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-    
-    # Update only provided fields
-    update_data = {k: v for k, v in order_update.items() if v is not None}
+    # Update only provided fields; validating them here keeps stored
+    # documents valid for order_from_db
+    update_data = order_update.model_dump(exclude_none=True)
     update_data["updated_at"] = datetime.utcnow()
     
-    await db.orders.update_one({"id": order_id}, {"$set": update_data})
-    updated_order = await db.orders.find_one({"id": order_id})
-    return Order(**updated_order)
+    updated_order = await db.orders.find_one_and_update(
+        {"id": order_id},
+        {"$set": update_data},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated_order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order_from_db(updated_order)
 
-@api_router.post("/orders/optimize", response_model=RouteOptimizationResponse)
+# Returned directly as ORJSONResponse, like get_orders
+@api_router.post("/orders/optimize", response_model=None, responses={200: {"model": RouteOptimizationResponse}})
 async def optimize_orders(request: RouteOptimizationRequest):
     """Optimize route for multiple orders"""
-    # Fetch orders from database
-    orders = []
+    # Fetch all orders from database in a single round-trip
+    cursor = db.orders.find({"id": {"$in": request.order_ids}}, {"_id": 0})
+    docs = await cursor.to_list(length=len(request.order_ids))
+    by_id = {doc["id"]: doc for doc in docs}
+    
+    # Keep the requested order
     for order_id in request.order_ids:
-        order_data = await db.orders.find_one({"id": order_id})
-        if not order_data:
+        if order_id not in by_id:
             raise HTTPException(status_code=404, detail=f"Order {order_id} not found")
-        orders.append(Order(**order_data))
+    orders = _ORDER_LIST_ADAPTER.validate_python([by_id[order_id] for order_id in request.order_ids])
     
-    # Perform route optimization
-    optimized_route = optimize_route(orders, request.current_location)
-    
-    # Calculate profits
-    profit_info = calculate_profits(orders, optimized_route)
+    # Repeated requests for unchanged orders reuse the previous result
+    orders_key = tuple(
+        (order.id, location_key(order.pickup_location), location_key(order.delivery_location))
+        for order in orders
+    )
     
-    return RouteOptimizationResponse(
-        route=optimized_route,
-        estimated_profit=profit_info["merged_profit"],
-        individual_profit=profit_info["individual_profit"],
-        merged_profit=profit_info["merged_profit"],
-        time_saved=profit_info["time_saved"],
-        distance_saved=profit_info["distance_saved"]
+    # Optimization is CPU-bound; run it off the event loop
+    optimization = await asyncio.to_thread(
+        optimization_response, orders_key, location_key(request.current_location)
     )
+    return ORJSONResponse(optimization.model_dump(mode="json"))
 
 @api_router.post("/notification/parse", response_model=OrderCreate)
 async def parse_notification(request: NotificationParseRequest):
@@ -371,57 +547,64 @@ async def parse_notification(request: NotificationParseRequest):
         raise HTTPException(status_code=400, detail="Could not extract order details from notification")
     return order
 
-@api_router.get("/mock/orders", response_model=List[Order])
-async def get_mock_orders(count: int = Query(5, ge=1, le=20)):
+def generate_mock_orders(count: int) -> List[Order]:
     """Generate mock orders for testing"""
     app_options = list(DeliveryApp)
     
-    # Generate random locations in Cairo
-    locations = [
-        {"lat": 30.0444, "lng": 31.2357, "address": "Downtown Cairo"},
-        {"lat": 30.0566, "lng": 31.2394, "address": "Tahrir Square"},
-        {"lat": 30.0455, "lng": 31.2240, "address": "Cairo University"},
-        {"lat": 30.0626, "lng": 31.2497, "address": "Ramses Square"},
-        {"lat": 30.0700, "lng": 31.2200, "address": "Dokki"},
-        {"lat": 30.0571, "lng": 31.2272, "address": "Mohandiseen"},
-        {"lat": 30.0484, "lng": 31.2354, "address": "Garden City"},
-        {"lat": 30.0751, "lng": 31.2394, "address": "Heliopolis"},
-    ]
+    # Draw all random values for the batch at once
+    pickup_idx, delivery_idx = mock_location_indices(count)
+    app_idx = _RNG.integers(0, len(app_options), size=count).tolist()
+    restaurant_nums, customer_nums, item_nums = _RNG.integers(1, 101, size=(3, count)).tolist()
+    amounts = _RNG.integers(50, 501, size=count).tolist()
     
     # Generate mock orders
     mock_orders = []
     for i in range(count):
-        pickup_idx = random.randint(0, len(locations) - 1)
-        delivery_idx = random.randint(0, len(locations) - 1)
-        while delivery_idx == pickup_idx:
-            delivery_idx = random.randint(0, len(locations) - 1)
-        
-        pickup = locations[pickup_idx]
-        delivery = locations[delivery_idx]
-        
-        # Create mock order
         order = Order(
-            id=str(uuid.uuid4()),
-            source_app=random.choice(app_options),
-            pickup_location=Location(lat=pickup["lat"], lng=pickup["lng"], address=pickup["address"]),
-            delivery_location=Location(lat=delivery["lat"], lng=delivery["lng"], address=delivery["address"]),
+            source_app=app_options[app_idx[i]],
+            pickup_location=mock_location(pickup_idx[i]),
+            delivery_location=mock_location(delivery_idx[i]),
             pickup_time=datetime.utcnow(),
             delivery_deadline=None,
             status=OrderStatus.PENDING,
-            restaurant_name=f"Restaurant {random.randint(1, 100)}",
-            customer_name=f"Customer {random.randint(1, 100)}",
-            amount=random.randint(50, 500),
-            items=f"Order Items {random.randint(1, 100)}"
+            restaurant_name=f"Restaurant {restaurant_nums[i]}",
+            customer_name=f"Customer {customer_nums[i]}",
+            amount=amounts[i],
+            items=f"Order Items {item_nums[i]}"
         )
         mock_orders.append(order)
     
     return mock_orders
 
-@api_router.get("/mock/optimize", response_model=RouteOptimizationResponse)
-async def get_mock_optimization():
+# Mock responses are random demo data, so browsers and proxies may reuse them
+MOCK_MAX_AGE = 60  # seconds
+MOCK_CACHE_CONTROL = f"public, max-age={MOCK_MAX_AGE}"
+MOCK_POOL_SIZE = 20
+
+# Returned directly as ORJSONResponse, like get_orders
+@api_router.get("/mock/orders", response_model=None, responses={200: {"model": List[Order]}})
+async def get_mock_orders(count: int = Query(5, ge=1, le=20)):
+    """Generate mock orders for testing"""
+    mock_orders = generate_mock_orders(count)
+    return ORJSONResponse(
+        [order.model_dump(mode="json") for order in mock_orders],
+        headers={"Cache-Control": MOCK_CACHE_CONTROL}
+    )
+
+# Returned directly as ORJSONResponse, like get_orders
+@api_router.post("/mock/orders/seed", response_model=None, responses={200: {"model": List[Order]}})
+async def seed_mock_orders(count: int = Query(5, ge=1, le=20)):
+    """Generate mock orders and store them so they can be fetched and optimized by id"""
+    mock_orders = generate_mock_orders(count)
+    
+    # Store the whole batch in one round-trip
+    await db.orders.insert_many([order.model_dump() for order in mock_orders], ordered=False)
+    return ORJSONResponse([order.model_dump(mode="json") for order in mock_orders])
+
+def generate_mock_optimization() -> RouteOptimizationResponse:
     """Generate mock optimization response for testing"""
     # Get 3 mock orders
-    mock_orders = await get_mock_orders(3)
+    mock_orders = generate_mock_orders(3)
     
     # Generate a mock starting location (driver location)
     current_location = Location(
@@ -430,33 +613,54 @@ async def get_mock_optimization():
         address="Current Location"
     )
     
-    # Optimize the route
-    optimized_route = optimize_route(mock_orders, current_location)
-    
-    # Calculate profits
-    profit_info = calculate_profits(mock_orders, optimized_route)
-    
-    return RouteOptimizationResponse(
-        route=optimized_route,
-        estimated_profit=profit_info["merged_profit"],
-        individual_profit=profit_info["individual_profit"],
-        merged_profit=profit_info["merged_profit"],
-        time_saved=profit_info["time_saved"],
-        distance_saved=profit_info["distance_saved"]
-    )
+    return build_optimization_response(mock_orders, current_location)
 
-# Include the router in the main app
-app.include_router(api_router)
+@lru_cache(maxsize=1)
+def mock_optimization_pool() -> tuple:
+    """Pre-generated mock optimization responses paired with their ETags"""
+    pool = []
+    for _ in range(MOCK_POOL_SIZE):
+        optimization = generate_mock_optimization()
+        etag = '"%s"' % hashlib.sha1(optimization.model_dump_json().encode()).hexdigest()
+        pool.append((optimization, etag))
+    return tuple(pool)
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match check using weak comparison (RFC 9110 13.1.2)"""
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # Proxies that re-encode the body send the tag back as W/"..."
+    return "*" in tags or etag in (tag.removeprefix("W/") for tag in tags)
 
-# Configure CORS
+@api_router.get("/mock/optimize", response_model=RouteOptimizationResponse)
+async def get_mock_optimization(request: Request, response: Response):
+    """Serve a pre-generated mock optimization response for testing"""
+    # Serve the same pool entry for a whole max-age window so the ETag is
+    # stable per URL and revalidation can succeed
+    bucket = int(time.time() // MOCK_MAX_AGE) % MOCK_POOL_SIZE
+    optimization, etag = mock_optimization_pool()[bucket]
+    headers = {"Cache-Control": MOCK_CACHE_CONTROL, "ETag": etag}
+    
+    # Let clients revalidate a cached copy without resending the body
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    
+    response.headers.update(headers)
+    return optimization
+
+# Configure CORS for the known frontend origins; credentials are not allowed
+# with a wildcard origin
+cors_origins = os.environ.get('CORS_ORIGINS', 'http://localhost:3000')
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
-    allow_origins=["*"],
+    allow_origins=[origin.strip() for origin in cors_origins.split(',') if origin.strip()],
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+# Include the router in the main app
+app.include_router(api_router)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -464,11 +668,31 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Orders are looked up by the app-generated id and listed by status/recency
+ORDER_INDEXES = [
+    ("id", {"unique": True}),
+    ([("status", 1), ("created_at", -1)], {}),
+]
+
+async def ensure_indexes():
+    """Create the order indexes, logging a warning for any that fail"""
+    for keys, options in ORDER_INDEXES:
+        try:
+            await db.orders.create_index(keys, **options)
+        except PyMongoError as e:
+            logger.warning(f"Could not create order index {keys}: {e}")
+
 @app.on_event("startup")
 async def startup():
     logger.info("Mandoob Pro API starting up")
+    # Index creation waits for server selection, so run it in the background;
+    # the API and its mock endpoints serve requests even when Mongo is down
+    app.state.index_task = asyncio.create_task(ensure_indexes())
+    # Build the mock optimization pool before the first request needs it
+    await asyncio.to_thread(mock_optimization_pool)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    app.state.index_task.cancel()
     client.close()
     logger.info("Mandoob Pro API shutting down")
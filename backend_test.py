@@ -107,7 +107,7 @@ class MandoobProAPITester(unittest.TestCase):
         """Test route optimization"""
         print("\n🔍 Testing route optimization...")
         # Get some order IDs first
-        response = requests.get(f"{self.base_url}/mock/orders?count=3")
+        response = requests.post(f"{self.base_url}/mock/orders/seed?count=3")
         self.assertEqual(response.status_code, 200)
         orders = response.json()
         order_ids = [order["id"] for order in orders]
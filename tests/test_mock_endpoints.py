@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Pin the pool bucket so consecutive requests see the same entry
+    monkeypatch.setattr(server, "time", SimpleNamespace(time=lambda: 0.0))
+    # No lifespan: the tests must not depend on Mongo
+    return TestClient(server.app)
+
+
+def test_mock_optimize_sets_cache_headers(client):
+    response = client.get("/api/mock/optimize")
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == server.MOCK_CACHE_CONTROL
+    assert response.headers["etag"].startswith('"')
+    assert "route" in response.json()
+
+
+@pytest.mark.parametrize("if_none_match", [
+    "{etag}",
+    "W/{etag}",
+    '"other", {etag}',
+    '"other", W/{etag}',
+    "*",
+])
+def test_mock_optimize_not_modified(client, if_none_match):
+    etag = client.get("/api/mock/optimize").headers["etag"]
+    response = client.get("/api/mock/optimize", headers={"If-None-Match": if_none_match.format(etag=etag)})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+
+@pytest.mark.parametrize("if_none_match", ['"other"', 'W/"other"'])
+def test_mock_optimize_modified(client, if_none_match):
+    response = client.get("/api/mock/optimize", headers={"If-None-Match": if_none_match})
+
+    assert response.status_code == 200
+    assert "route" in response.json()
@@ -0,0 +1,42 @@
+import pytest
+
+from server import DeliveryApp, extract_order_from_notification
+
+
+@pytest.mark.parametrize("text, app", [
+    ("New Talabat order", DeliveryApp.TALABAT),
+    ("طلب جديد من طلبات", DeliveryApp.TALABAT),
+    ("Uber order via Talabat", DeliveryApp.TALABAT),
+    ("Otlob order forwarded from Elmenus", DeliveryApp.ELMENUS),
+    ("Otlob or Uber", DeliveryApp.UBER_EATS),
+    ("New order", DeliveryApp.OTHER),
+])
+def test_detects_app_by_precedence(text, app):
+    assert extract_order_from_notification(text).source_app == app
+
+
+def test_explicit_app_is_kept():
+    order = extract_order_from_notification("Talabat order", DeliveryApp.CAREEM)
+    assert order.source_app == DeliveryApp.CAREEM
+
+
+@pytest.mark.parametrize("text, restaurant, customer", [
+    ("New order from restaurant KFC for customer Ahmed", "KFC for customer Ahmed", "Ahmed"),
+    ("restaurant KFC, customer Ahmed, total 120", "KFC", "Ahmed"),
+    ("مطعم كنتاكي للعميل أحمد", "كنتاكي للعميل أحمد", "أحمد"),
+    ("مطعم الشبراوي، عميل محمد، ", "الشبراوي", "محمد"),
+    ("restaurant KFC، مطعم كنتاكي", "KFC، مطعم كنتاكي", None),
+])
+def test_extracts_names(text, restaurant, customer):
+    order = extract_order_from_notification(text)
+    assert order.restaurant_name == restaurant
+    if customer is None:
+        assert order.customer_name.startswith("Customer ")
+    else:
+        assert order.customer_name == customer
+
+
+def test_falls_back_to_generated_names():
+    order = extract_order_from_notification("restaurant , customer ")
+    assert order.restaurant_name.startswith("Restaurant ")
+    assert order.customer_name.startswith("Customer ")
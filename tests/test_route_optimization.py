@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+import server
+from server import DeliveryApp, Location, Order, improve_route, optimize_route
+
+START = Location(lat=30.05, lng=31.25)
+
+
+def random_orders(rng, count):
+    def location():
+        return Location(lat=30 + rng.random() * 0.1, lng=31.2 + rng.random() * 0.1)
+
+    return [
+        Order(source_app=DeliveryApp.TALABAT, pickup_location=location(), delivery_location=location())
+        for _ in range(count)
+    ]
+
+
+def instances(n=100, seed=0):
+    rng = np.random.default_rng(seed)
+    return [random_orders(rng, 1 + i % 7) for i in range(n)]
+
+
+def greedy_route(monkeypatch, orders):
+    with monkeypatch.context() as m:
+        m.setattr(server, "improve_route", lambda idx_seq, D: idx_seq)
+        return optimize_route(orders, START)
+
+
+@pytest.mark.parametrize("orders", instances())
+def test_route_visits_each_point_once_pickup_first(orders):
+    route = optimize_route(orders, START)
+
+    assert len(route.points) == 2 * len(orders)
+    assert len({(p.order_id, p.is_pickup) for p in route.points}) == 2 * len(orders)
+    picked_up = set()
+    for point in route.points:
+        if point.is_pickup:
+            picked_up.add(point.order_id)
+        else:
+            assert point.order_id in picked_up
+
+
+@pytest.mark.parametrize("orders", instances())
+def test_two_opt_never_worse_than_greedy(monkeypatch, orders):
+    greedy = greedy_route(monkeypatch, orders)
+    assert optimize_route(orders, START).total_distance <= greedy.total_distance + 1e-9
+
+
+def test_two_opt_improves_greedy_overall(monkeypatch):
+    orders_list = instances()
+    greedy = sum(greedy_route(monkeypatch, orders).total_distance for orders in orders_list)
+    improved = sum(optimize_route(orders, START).total_distance for orders in orders_list)
+    assert improved < greedy
+
+
+def test_improve_route_respects_pickup_order():
+    # Points on a line: order 0 is picked up at 0 and delivered at 1, order 1
+    # is picked up at 3 and delivered at 2, and the start (last row) is at -1
+    coords = np.array([[0.0], [1.0], [3.0], [2.0], [-1.0]])
+    D = np.abs(coords - coords.T)
+
+    # Greedy-like start -> P1 -> P0 -> D0 -> D1 costs 9; the best valid route
+    # start -> P0 -> D0 -> P1 -> D1 costs 5, while the shorter-looking
+    # start -> P0 -> D0 -> D1 -> P1 would deliver order 1 before pickup
+    seq = improve_route(np.array([4, 2, 0, 1, 3]), D)
+
+    assert seq.tolist() == [4, 0, 1, 2, 3]
+    assert D[seq[:-1], seq[1:]].sum() == 5
+
+
+def test_single_order_saves_the_return_leg():
+    # Starting at the pickup, the merged route is one pickup-to-delivery leg
+    # and the individual estimate is that leg there and back; both must be
+    # measured in the same projection for the saving to equal one leg
+    order = Order(
+        source_app=DeliveryApp.TALABAT,
+        pickup_location=Location(lat=30.0, lng=31.2),
+        delivery_location=Location(lat=30.1, lng=31.3),
+    )
+    response = server.build_optimization_response([order], order.pickup_location)
+
+    assert response.distance_saved == pytest.approx(response.route.total_distance)
@@ -0,0 +1,42 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from pymongo.errors import DuplicateKeyError
+
+import server
+
+
+def fake_db(create_index):
+    return SimpleNamespace(orders=SimpleNamespace(create_index=create_index))
+
+
+def test_each_index_is_guarded(monkeypatch):
+    created = []
+
+    async def create_index(keys, **options):
+        if options.get("unique"):
+            raise DuplicateKeyError("duplicate id")
+        created.append(keys)
+
+    monkeypatch.setattr(server, "db", fake_db(create_index))
+    asyncio.run(server.ensure_indexes())
+
+    assert created == [[("status", 1), ("created_at", -1)]]
+
+
+def test_startup_does_not_wait_for_mongo(monkeypatch):
+    async def create_index(keys, **options):
+        # Stands in for Motor waiting out server selection
+        await asyncio.sleep(30)
+
+    monkeypatch.setattr(server, "db", fake_db(create_index))
+
+    async def run():
+        started = time.monotonic()
+        await server.startup()
+        elapsed = time.monotonic() - started
+        server.app.state.index_task.cancel()
+        return elapsed
+
+    assert asyncio.run(run()) < 5